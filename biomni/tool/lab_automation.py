@@ -1,25 +1,108 @@
 import ast
-import asyncio
+import atexit
+import csv
+import functools
+import gzip
+import importlib
+import importlib.util
 import io
 import json
+import marshal
 import os
+import re
+import shutil
 import sqlite3
+import subprocess
+import sys
 import tempfile
+import threading
 import time
 import traceback
 import urllib.request
 import zipfile
-from datetime import datetime
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from operator import itemgetter
+from pathlib import Path
+from types import CodeType
 from typing import Any
 
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+
+    def _json_dumps_indented(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+except ImportError:  # orjson not installed; stdlib json works on str
+
+    def _json_loads(data: bytes) -> Any:
+        return json.loads(data.decode("utf-8"))
+
+    def _json_dumps_indented(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2).encode("utf-8")
+
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+else:
+    # Only stream with a C backend; ijson's pure-Python parser is slower than decoding a whole
+    # (at most _MAX_DOC_ENTRY_BYTES) notebook with _json_loads
+    if ijson.backend not in ("yajl2_c", "yajl2_cffi"):
+        ijson = None
+
+
 # ------------------------------------------------------------
 # Dynamic PyLabRobot documentation/content loader
 # ------------------------------------------------------------
 
 _MAX_DOC_CHARS = int("50000")
+# Zip entries larger than this are almost always notebooks dominated by embedded image outputs
+_MAX_DOC_ENTRY_BYTES = 2_000_000
+# Part of the section cache's file name, so caches written by an older version are not served. Bump
+# it whenever what gets cached for an unchanged ref changes: the entry filter in
+# _collect_docs_from_github_zip, _extract_doc_text, or the per-doc truncation.
+_DOCS_CACHE_FORMAT_VERSION = 2
+_DOCS_CACHE_DB_NAME = f"plr-docs-v{_DOCS_CACHE_FORMAT_VERSION}.sqlite"
+_DOC_EXTENSIONS = (".md", ".rst", ".txt", ".ipynb")
+
+# Curated (heading, filename keywords) order for the liquid-handling user guide
+_LIQUID_GUIDE_SECTIONS = (
+    (
+        "Getting started with liquid handling on a Hamilton STAR(let)",
+        ("/hamilton-star/", "basic.ipynb", "basic", "getting-started"),
+    ),
+    ("iSWAP Module", ("iswap",)),
+    ("Liquid level detection on Hamilton STAR(let)", ("liquid-level", "lld", "level_detection", "level-detection")),
+    ("Z-probing", ("z-probing", "z_probing", "zprobing", "z-prob")),
+    ("Foil", ("foil",)),
+    ("Using the 96 head", ("96", "head", "mca", "96-head", "head-96")),
+    (
+        "Using “Hamilton Liquid Classes” with Pylabrobot",
+        ("liquid-classes", "liquid_classes", "hamilton-liquid-classes"),
+    ),
+)
+
+
+# Docs text per section; only non-empty results are kept, so a failed fetch is retried on the next call
+_TUTORIAL_CONTENT_CACHE: dict[str, str] = {}
 
 
 def _load_pylabrobot_tutorial_content(section: str) -> str:
+    """Return PLR tutorial/docs text for the section, fetching it on first successful use."""
+    text = _TUTORIAL_CONTENT_CACHE.get(section)
+    if text is None:
+        text = _fetch_pylabrobot_tutorial_content(section)
+        if text:
+            _TUTORIAL_CONTENT_CACHE[section] = text
+    return text
+
+
+def _fetch_pylabrobot_tutorial_content(section: str) -> str:
     """Load PLR tutorial/docs text from multiple sources with graceful fallback.
 
     Precedence:
@@ -64,15 +147,22 @@ def _collect_docs_from_github_zip(repo: str, ref: str, section: str) -> list[tup
     if not repo:
         return []
 
-    # Try commit zip first if ref looks like a commit SHA, then branch, then tag
-    url = f"https://github.com/{repo}/archive/{ref}.zip"
+    cached_docs = _read_cached_section_docs(ref, section)
+    if cached_docs is not None:
+        return cached_docs
 
-    data = None
+    # The archive for a pinned ref never changes, so keep it on disk across processes
     try:
-        with urllib.request.urlopen(url, timeout=20) as resp:
-            data = resp.read()
-    except Exception:
+        cache_path = os.path.join(_docs_cache_dir(), f"plr-{ref}.zip")
+    except OSError:
         return []
+    if not os.path.exists(cache_path):
+        # Try commit zip first if ref looks like a commit SHA, then branch, then tag
+        url = f"https://github.com/{repo}/archive/{ref}.zip"
+        try:
+            _download_to_file(url, cache_path)
+        except Exception:
+            return []
 
     # Restrict to specific subfolders by section
     if section == "liquid":
@@ -84,121 +174,214 @@ def _collect_docs_from_github_zip(repo: str, ref: str, section: str) -> list[tup
 
     collected_named: list[tuple[str, str]] = []
     try:
-        with zipfile.ZipFile(io.BytesIO(data)) as zf:
-            # Select relevant names within target_subdir
-            candidate_names = []
-            for name in zf.namelist():
-                lower = name.lower()
-                if target_subdir not in lower:
-                    continue
-                if lower.endswith("/"):
-                    continue
-                if not (
-                    lower.endswith(".md")
-                    or lower.endswith(".rst")
-                    or lower.endswith(".txt")
-                    or lower.endswith(".ipynb")
+        with zipfile.ZipFile(cache_path) as zf:
+            # Select relevant entries within target_subdir in a single pass over the central directory
+            entries = []
+            for info in zf.infolist():
+                lower = info.filename.lower()
+                if (
+                    target_subdir in lower
+                    and not info.is_dir()
+                    and lower.endswith(_DOC_EXTENSIONS)
+                    and info.file_size <= _MAX_DOC_ENTRY_BYTES
                 ):
-                    continue
-                candidate_names.append(name)
+                    entries.append((lower, info))
 
             # Deterministic order; for liquid, ensure basic.ipynb first
             if section == "liquid":
-                candidate_names.sort(key=lambda n: (0 if n.lower().endswith("basic.ipynb") else 1, n.lower()))
+                entries.sort(key=lambda e: (0 if e[0].endswith("basic.ipynb") else 1, e[0]))
             else:
-                candidate_names.sort(key=lambda n: n.lower())
-
-            for name in candidate_names:
-                lower = name.lower()
-                try:
-                    with zf.open(name) as f:
-                        content_bytes = f.read()
-                        if lower.endswith(".ipynb"):
-                            try:
-                                nb = json.loads(content_bytes.decode("utf-8"))
-                            except Exception:
-                                continue
-                            cells = nb.get("cells") or nb.get("worksheets", [{}])[0].get("cells", [])
-                            parts = []
-                            for c in cells:
-                                ctype = c.get("cell_type") or c.get("type")
-                                src = c.get("source") or c.get("input") or []
-                                if isinstance(src, list):
-                                    src = "".join(src)
-                                if not isinstance(src, str):
-                                    continue
-                                if ctype == "markdown":
-                                    parts.append(src)
-                                elif ctype == "code":
-                                    keep_lines = []
-                                    for line in src.splitlines():
-                                        l = line.strip()
-                                        if l.startswith("#"):
-                                            continue
-                                        if "pylabrobot" in l and ("import " in l or "from " in l):
-                                            keep_lines.append(l)
-                                    if keep_lines:
-                                        parts.append("Code refs:\n" + "\n".join(keep_lines[:20]))
-                                if sum(len(p) for p in parts) > 5000:
-                                    break
-                            text = "\n\n".join(parts)
-                        else:
-                            try:
-                                text = content_bytes.decode("utf-8")
-                            except Exception:
-                                text = str(content_bytes)
-                        if text:
-                            collected_named.append((lower, text[:5000]))
-                except Exception:
-                    continue
+                entries.sort(key=lambda e: e[0])
+
+            # Inflating entries (zlib) releases the GIL, so decode them concurrently; executor.map
+            # keeps the results in entry order
+            if entries:
+                with ThreadPoolExecutor(max_workers=min(8, len(entries))) as executor:
+                    texts = list(executor.map(lambda entry: _extract_doc_text(zf, *entry), entries))
+                for (lower, _), text in zip(entries, texts, strict=True):
+                    if text:
+                        collected_named.append((lower, text[:5000]))
+    except zipfile.BadZipFile:
+        # Drop a truncated/corrupt cached archive so the next call downloads it again
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass
+        return []
     except Exception:
         return []
 
+    if collected_named:
+        _write_cached_section_docs(ref, section, collected_named)
     return collected_named
 
 
+def _extract_doc_text(zf: zipfile.ZipFile, lower: str, info: zipfile.ZipInfo) -> str:
+    """Return the useful text of one archive entry, or "" if it cannot be read.
+
+    Notebooks keep their markdown cells and pylabrobot import lines; other files are decoded as-is.
+    Safe to call from several threads: each call uses its own ZipFile.open() handle.
+    Results are cached on disk; bump _DOCS_CACHE_FORMAT_VERSION when changing what this returns.
+    """
+    try:
+        with zf.open(info) as f:
+            content_bytes = f.read()
+        if not lower.endswith(".ipynb"):
+            try:
+                return content_bytes.decode("utf-8")
+            except Exception:
+                return str(content_bytes)
+
+        # Malformed notebooks raise while iterating; the entry is then skipped
+        parts = []
+        parts_len = 0
+        for c in _iter_notebook_cells(content_bytes):
+            ctype = c.get("cell_type") or c.get("type")
+            src = c.get("source") or c.get("input") or []
+            if isinstance(src, list):
+                src = "".join(src)
+            if not isinstance(src, str):
+                continue
+            if ctype == "markdown":
+                parts.append(src)
+                parts_len += len(src)
+            elif ctype == "code":
+                keep_lines = []
+                for line in src.splitlines():
+                    l = line.strip()
+                    if l.startswith("#"):
+                        continue
+                    if "pylabrobot" in l and ("import " in l or "from " in l):
+                        keep_lines.append(l)
+                if keep_lines:
+                    parts.append("Code refs:\n" + "\n".join(keep_lines[:20]))
+                    parts_len += len(parts[-1])
+            if parts_len > 5000:
+                # Stop reading; with ijson the remaining cells are never parsed
+                break
+        return "\n\n".join(parts)
+    except Exception:
+        return ""
+
+
+def _iter_notebook_cells(content_bytes: bytes):
+    """Yield the cells of an .ipynb document.
+
+    With a C-backed ijson installed the cells are streamed one at a time, so large embedded outputs in
+    later cells are never parsed once the caller stops iterating. Otherwise the whole
+    notebook is decoded up front.
+    """
+    if ijson is None:
+        nb = _json_loads(content_bytes)
+        yield from nb.get("cells") or nb.get("worksheets", [{}])[0].get("cells", [])
+        return
+
+    found = False
+    for cell in ijson.items(io.BytesIO(content_bytes), "cells.item"):
+        found = True
+        yield cell
+    if not found:
+        # nbformat 3 keeps cells under worksheets
+        yield from ijson.items(io.BytesIO(content_bytes), "worksheets.item.cells.item")
+
+
+def _download_to_file(url: str, path: str) -> None:
+    """Stream url into path without buffering the body; os.replace makes the final write atomic."""
+    request = urllib.request.Request(url, headers={"Accept-Encoding": "gzip", "User-Agent": "biomni"})
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f, urllib.request.urlopen(request, timeout=20) as resp:
+            body = gzip.GzipFile(fileobj=resp) if resp.headers.get("Content-Encoding") == "gzip" else resp
+            shutil.copyfileobj(body, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _docs_cache_dir() -> str:
+    """Per-user cache directory for the docs archive and extracted sections (created 0o700).
+
+    Not the shared temp dir: other local users could pre-create the files there and inject text
+    that ends up in the prompt.
+    """
+    base_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    cache_dir = os.path.join(base_dir, "biomni")
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    return cache_dir
+
+
+def _connect_docs_cache() -> sqlite3.Connection:
+    conn = sqlite3.connect(os.path.join(_docs_cache_dir(), _DOCS_CACHE_DB_NAME))
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS section_docs (
+            ref TEXT NOT NULL,
+            section TEXT NOT NULL,
+            docs TEXT NOT NULL,
+            PRIMARY KEY (ref, section)
+        )
+        """
+    )
+    return conn
+
+
+def _read_cached_section_docs(ref: str, section: str) -> list[tuple[str, str]] | None:
+    """Return previously extracted (filename_lower, text) docs for (ref, section), or None."""
+    try:
+        conn = _connect_docs_cache()
+        try:
+            row = conn.execute("SELECT docs FROM section_docs WHERE ref = ? AND section = ?", (ref, section)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return [(name, text) for name, text in json.loads(row[0])]
+    except (sqlite3.Error, OSError, ValueError, TypeError):
+        return None
+
+
+def _write_cached_section_docs(ref: str, section: str, docs: list[tuple[str, str]]) -> None:
+    try:
+        conn = _connect_docs_cache()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO section_docs (ref, section, docs) VALUES (?, ?, ?)",
+                    (ref, section, json.dumps(docs)),
+                )
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        pass
+
+
 def _format_liquid_user_guide(named_docs: list[tuple[str, str]]) -> str:
     """Assemble liquid-handling docs into a curated order with headings.
 
     named_docs: list of (filename_lower, text) from GitHub.
     Returns a single formatted string.
     """
-    sections = [
-        (
-            "Getting started with liquid handling on a Hamilton STAR(let)",
-            ["/hamilton-star/", "basic.ipynb", "basic", "getting-started"],
-        ),
-        ("iSWAP Module", ["iswap"]),
-        ("Liquid level detection on Hamilton STAR(let)", ["liquid-level", "lld", "level_detection", "level-detection"]),
-        ("Z-probing", ["z-probing", "z_probing", "z-probing", "zprobing", "z-prob"]),
-        ("Foil", ["foil"]),
-        ("Using the 96 head", ["96", "head", "mca", "96-head", "head-96"]),
-        (
-            "Using “Hamilton Liquid Classes” with Pylabrobot",
-            ["liquid-classes", "liquid_classes", "hamilton-liquid-classes"],
-        ),
-    ]
-
-    used: set[int] = set()
+    # Indices of docs not yet claimed by a section, in their original order. Keywords overlap
+    # ("/hamilton-star/" matches every file), so sections claim docs greedily in section order;
+    # claimed docs drop out, so every (section, doc) pair is tested at most once.
+    remaining = list(range(len(named_docs)))
     out_parts: list[str] = []
 
-    def pick_first(keywords: list[str]) -> str:
-        for idx, (fname, text) in enumerate(named_docs):
-            if idx in used:
-                continue
+    for heading, keywords in _LIQUID_GUIDE_SECTIONS:
+        for pos, idx in enumerate(remaining):
+            fname, text = named_docs[idx]
             if any(k in fname for k in keywords):
-                used.add(idx)
-                return text
-        return ""
-
-    for heading, keywords in sections:
-        text = pick_first(keywords)
-        if text:
-            out_parts.append(f"## {heading}\n\n{text}")
+                del remaining[pos]
+                if text:
+                    out_parts.append(f"## {heading}\n\n{text}")
+                break
 
     # Append any remaining docs not matched, to avoid losing content
-    for idx, (fname, text) in enumerate(named_docs):
-        if idx not in used and text:
+    for idx in remaining:
+        fname, text = named_docs[idx]
+        if text:
             # Derive a nice title from filename
             leaf = fname.rsplit("/", 1)[-1]
             title = leaf.replace("_", " ").replace("-", " ")
@@ -287,9 +470,7 @@ def test_pylabrobot_script(
     script_content = ""
     try:
         # Check if input looks like a file path and exists
-        if (
-            script_input.endswith(".py") and os.path.isfile(script_input) and "\n" not in script_input[:100]
-        ):  # Basic heuristic: file paths shouldn't have newlines
+        if _looks_like_script_path(script_input) and os.path.isfile(script_input):
             try:
                 with open(script_input, encoding="utf-8") as f:
                     script_content = f.read()
@@ -327,7 +508,7 @@ def test_pylabrobot_script(
     try:
         # Step 1: Syntax Validation
         try:
-            ast.parse(script_content)
+            tree = ast.parse(script_content)
             test_results["syntax_valid"] = True
         except SyntaxError as e:
             errors.append(f"Syntax Error: {str(e)} at line {e.lineno}")
@@ -336,17 +517,17 @@ def test_pylabrobot_script(
             )
 
         # Step 2: Import Validation
-        import_results = _validate_pylabrobot_imports(script_content)
+        import_results = _validate_pylabrobot_imports(tree)
         test_results["imports_valid"] = import_results["success"]
         if not import_results["success"]:
             errors.extend(import_results["errors"])
             warnings.extend(import_results["warnings"])
 
         # Step 3: Replace backends with ChatterboxBackend for simulation
-        modified_script = _modify_script_for_testing(script_content, enable_tracking)
+        _, code = _modify_script_for_testing(script_content.split("\n"), tree, enable_tracking)
 
         # Step 4: Execute script in controlled environment
-        execution_result = _execute_script_safely(modified_script, timeout_seconds)
+        execution_result = _execute_script_safely(code, timeout_seconds)
 
         test_results["simulation_successful"] = execution_result["success"]
         execution_summary.update(execution_result["summary"])
@@ -358,7 +539,8 @@ def test_pylabrobot_script(
 
     except Exception as e:
         errors.append(f"Unexpected error during testing: {str(e)}")
-        traceback.print_exc()
+        # Keep the trace in the structured result instead of writing to stderr
+        errors.append(traceback.format_exc())
 
     overall_success = (
         test_results["syntax_valid"] and test_results["imports_valid"] and test_results["simulation_successful"]
@@ -376,17 +558,20 @@ def test_pylabrobot_script(
     )
 
 
-def _validate_pylabrobot_imports(script_content: str) -> dict[str, Any]:
-    """Validate that all PyLabRobot imports in the script are available."""
+def _validate_pylabrobot_imports(script: str | ast.Module) -> dict[str, Any]:
+    """Validate that all PyLabRobot imports in the script are available.
+
+    Accepts the script source or an already parsed module so callers can reuse their AST.
+    """
     import_errors = []
     import_warnings = []
 
     try:
         # Parse the script to find import statements
-        tree = ast.parse(script_content)
+        tree = ast.parse(script) if isinstance(script, str) else script
         pylabrobot_imports = []
 
-        for node in ast.walk(tree):
+        for node in _iter_module_imports(tree.body):
             if isinstance(node, ast.Import):
                 for alias in node.names:
                     if "pylabrobot" in alias.name:
@@ -397,30 +582,41 @@ def _validate_pylabrobot_imports(script_content: str) -> dict[str, Any]:
                         full_import = f"{node.module}.{alias.name}"
                         pylabrobot_imports.append(full_import)
 
-        # Try to import each PyLabRobot module/class
-        for import_name in pylabrobot_imports:
-            try:
-                # Handle different import patterns
-                if "." in import_name:
-                    parts = import_name.split(".")
-                    module_parts = parts[:-1]
-                    class_name = parts[-1]
-
-                    # Import the module
-                    module_name = ".".join(module_parts)
-                    module = __import__(module_name, fromlist=[class_name])
-
-                    # Check if the class/function exists
-                    if not hasattr(module, class_name):
-                        import_errors.append(f"Cannot find '{class_name}' in module '{module_name}'")
-                else:
-                    # Direct module import
-                    __import__(import_name)
+        # Group imported names by parent module so each module is resolved only once
+        module_attrs: dict[str, list[str]] = {}
+        for import_name in dict.fromkeys(pylabrobot_imports):
+            module_name, _, attr_name = import_name.rpartition(".")
+            if module_name:
+                module_attrs.setdefault(module_name, []).append(attr_name)
+            else:
+                # Direct module import
+                module_attrs.setdefault(attr_name, [])
 
+        for module_name, attr_names in module_attrs.items():
+            import_names = [f"{module_name}.{attr_name}" for attr_name in attr_names] or [module_name]
+            try:
+                # find_spec checks existence without executing the module itself
+                if importlib.util.find_spec(module_name) is None:
+                    raise ModuleNotFoundError(f"No module named '{module_name}'")
+                if not attr_names:
+                    continue
+                module = importlib.import_module(module_name)
             except ImportError as e:
-                import_errors.append(f"Failed to import '{import_name}': {str(e)}")
+                import_errors.extend(f"Failed to import '{import_name}': {str(e)}" for import_name in import_names)
+                continue
             except Exception as e:
-                import_warnings.append(f"Warning validating import '{import_name}': {str(e)}")
+                import_warnings.extend(
+                    f"Warning validating import '{import_name}': {str(e)}" for import_name in import_names
+                )
+                continue
+
+            # Check if the class/function (or submodule) exists
+            for attr_name in attr_names:
+                if hasattr(module, attr_name):
+                    continue
+                if hasattr(module, "__path__") and importlib.util.find_spec(f"{module_name}.{attr_name}"):
+                    continue
+                import_errors.append(f"Cannot find '{attr_name}' in module '{module_name}'")
 
     except Exception as e:
         import_errors.append(f"Error parsing imports: {str(e)}")
@@ -428,28 +624,43 @@ def _validate_pylabrobot_imports(script_content: str) -> dict[str, Any]:
     return {"success": len(import_errors) == 0, "errors": import_errors, "warnings": import_warnings}
 
 
-def _modify_script_for_testing(script_content: str, enable_tracking: bool) -> str:
-    """Modify script to use simulation backends and enable tracking."""
-    modified_script = script_content
+def _looks_like_script_path(script_input: str) -> bool:
+    """Rule out script source with string checks alone, so only plausible paths are stat()ed."""
+    return (
+        len(script_input) < 4096  # PATH_MAX
+        and script_input.endswith(".py")
+        and "\n" not in script_input
+        and not script_input.lstrip().startswith(("import ", "from ", "async ", "def ", "class ", "#", '"', "'"))
+    )
+
 
-    # Replace STARBackend with LiquidHandlerChatterboxBackend for simulation
-    replacements = [("STARBackend()", "LiquidHandlerChatterboxBackend()")]
+def _iter_module_imports(body: list[ast.stmt]):
+    """Yield module-level import nodes, including those guarded by try/except.
 
-    for old, new in replacements:
-        modified_script = modified_script.replace(old, new)
+    Function bodies, classes and expressions are not descended into; PLR scripts import at
+    module scope, and walking the whole tree is wasted work on large scripts.
+    """
+    for node in body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            yield node
+        elif isinstance(node, (ast.Try, ast.TryStar)):
+            yield from _iter_module_imports(node.body)
+            for handler in node.handlers:
+                yield from _iter_module_imports(handler.body)
+            yield from _iter_module_imports(node.orelse)
+            yield from _iter_module_imports(node.finalbody)
 
-    lines = modified_script.split("\n")
-    insert_at = 0
-    for i, line in enumerate(lines):
-        if line.strip().startswith(("from ", "import ", "#")):
-            insert_at = i + 1
-            continue
-        if line.strip().startswith(("async def", "def", "class", "if __name__")):
-            break
-        insert_at = i + 1
-    lines.insert(insert_at, "from pylabrobot.liquid_handling.backends import LiquidHandlerChatterboxBackend")
-    modified_script = "\n".join(lines)
 
+_STAR_BACKEND_RE = re.compile(r"\bSTARBackend\(\)")
+
+
+def _modify_script_for_testing(lines: list[str], tree: ast.Module, enable_tracking: bool) -> tuple[str, CodeType]:
+    """Modify script to use simulation backends and enable tracking.
+
+    ``lines`` is the script split on newlines and ``tree`` its parsed AST; the simulation
+    import and tracking setup go before the first top-level statement that is not an import.
+    Returns the modified source and its compiled code object.
+    """
     # Add tracking imports and setup at the beginning
     if enable_tracking:
         tracking_setup = """
@@ -474,66 +685,93 @@ except ImportError:
 
 """
 
-    # Insert after imports but before main function
-    lines = modified_script.split("\n")
-    insert_index = 0
-    for i, line in enumerate(lines):
-        if (
-            line.strip().startswith("async def")
-            or line.strip().startswith("def")
-            or line.strip().startswith("if __name__")
-        ):
-            insert_index = i
-            break
+    insert_at = _first_statement_index(tree, default=len(lines))
+    modified_script = "\n".join(
+        [
+            *lines[:insert_at],
+            "from pylabrobot.liquid_handling.backends import LiquidHandlerChatterboxBackend",
+            tracking_setup,
+            *lines[insert_at:],
+        ]
+    )
+
+    # Replace STARBackend with LiquidHandlerChatterboxBackend for simulation
+    modified_script = _STAR_BACKEND_RE.sub("LiquidHandlerChatterboxBackend()", modified_script)
+    return modified_script, compile(modified_script, "<plr_test>", "exec")
+
 
-    lines.insert(insert_index, tracking_setup)
-    modified_script = "\n".join(lines)
+def _first_statement_index(tree: ast.Module, default: int) -> int:
+    """Return the 0-based line index of the first top-level statement after the imports."""
+    for pos, node in enumerate(tree.body):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            continue
+        if pos == 0 and isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant):
+            # Module docstring
+            continue
+        # Decorators start before the def/class line itself
+        return min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])]) - 1
+    return default
 
-    return modified_script
 
+_SCRIPT_RESULT_MARKER = "__BIOMNI_PLR_TEST_RESULT__"
 
-def _execute_script_safely(script_content: str, timeout_seconds: int) -> dict[str, Any]:
-    """Execute the modified script in a safe environment."""
+# Executed by a fresh interpreter as ``python -c _SCRIPT_RUNNER <code_path> <marker>``. It loads the
+# marshalled code object of the test script, runs it (and its main(), if any) and reports the
+# outcome as a JSON trailer after the marker.
+_SCRIPT_RUNNER = """
+import asyncio
+import json
+import marshal
+import sys
+
+code_path, marker = sys.argv[1], sys.argv[2]
+summary = {"operations_performed": 0, "tips_used": 0, "liquid_transferred": 0.0}
+try:
+    with open(code_path, "rb") as f:
+        code = marshal.load(f)
+    namespace = {"__name__": "__main__", "__file__": code_path}
+    exec(code, namespace)
+    main = namespace.get("main")
+    if callable(main):
+        if asyncio.iscoroutinefunction(main):
+            asyncio.run(main())
+        else:
+            main()
+    outcome = {"summary": summary, "warnings": []}
+except Exception as e:
+    outcome = {"error": str(e)}
+print(marker + json.dumps(outcome))
+"""
+
+
+def _execute_script_safely(code: CodeType, timeout_seconds: int) -> dict[str, Any]:
+    """Execute the compiled, modified script in a safe environment."""
     errors = []
     warnings = []
     summary = {"operations_performed": 0, "tips_used": 0, "liquid_transferred": 0.0}
+    temp_script_path = None
 
     try:
-        # Create a temporary file for the script
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
-            f.write(script_content)
+        # Write the already compiled script so the child interpreter only has to run the bytecode;
+        # the child is the same sys.executable, so the marshal format matches
+        with tempfile.NamedTemporaryFile(mode="wb", suffix=".marshal", delete=False) as f:
+            marshal.dump(code, f)
             temp_script_path = f.name
 
         # Execute the script with timeout
         try:
-            # Use threading for timeout control
-            import threading
-
-            result = None
-            exception = None
+            result = _run_script_with_monitoring(temp_script_path, timeout_seconds)
 
-            def target():
-                nonlocal result, exception
-                try:
-                    result = _run_script_with_monitoring(temp_script_path)
-                except Exception as e:
-                    exception = e
-
-            thread = threading.Thread(target=target)
-            thread.start()
-            thread.join(timeout=timeout_seconds)
-
-            if thread.is_alive():
-                errors.append(f"Script execution timed out after {timeout_seconds} seconds")
-            elif exception:
-                raise exception
-            elif result:
+            if result:
                 summary.update(result.get("summary", {}))
                 warnings.extend(result.get("warnings", []))
 
                 return {"success": True, "summary": summary, "errors": errors, "warnings": warnings}
             else:
                 errors.append("Script execution completed but returned no result")
+        except subprocess.TimeoutExpired:
+            # subprocess.run has already killed and reaped the child
+            errors.append(f"Script execution timed out after {timeout_seconds} seconds")
         except Exception as e:
             errors.append(f"Script execution failed: {str(e)}")
 
@@ -541,73 +779,50 @@ def _execute_script_safely(script_content: str, timeout_seconds: int) -> dict[st
         errors.append(f"Failed to prepare script execution: {str(e)}")
     finally:
         # Clean up temporary file
-        try:
-            os.unlink(temp_script_path)
-        except OSError:
-            pass
+        if temp_script_path:
+            try:
+                os.unlink(temp_script_path)
+            except OSError:
+                pass
 
     return {"success": False, "summary": summary, "errors": errors, "warnings": warnings}
 
 
-def _run_script_with_monitoring(script_path: str) -> dict[str, Any]:
-    """Run the script and monitor its execution."""
-    # Note: This is a simplified version. In practice, you might want to
-    # use subprocess or other isolation methods for safety
+def _run_script_with_monitoring(code_path: str, timeout_seconds: int) -> dict[str, Any] | None:
+    """Run the marshalled script at code_path in a separate interpreter and monitor its execution.
 
-    warnings = []
-    summary = {"operations_performed": 0, "tips_used": 0, "liquid_transferred": 0.0}
+    A subprocess, unlike a thread, can actually be stopped: subprocess.run kills the child and
+    raises TimeoutExpired once timeout_seconds elapse. Returns None when the child exits without
+    reporting an outcome (e.g. the script called sys.exit()).
+    """
+    # Give the child the same import path as this process so it resolves the same pylabrobot
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(p for p in sys.path if p)}
+    proc = subprocess.run(
+        [sys.executable, "-c", _SCRIPT_RUNNER, code_path, _SCRIPT_RESULT_MARKER],
+        capture_output=True,
+        text=True,
+        timeout=timeout_seconds,
+        env=env,
+    )
 
-    try:
-        # Read and execute the script
-        with open(script_path) as f:
-            script_content = f.read()
-
-        # Create a namespace for execution
-        namespace = {
-            "__name__": "__main__",
-            "__file__": script_path,
-        }
-
-        # Execute the script
-        exec(script_content, namespace)
-
-        # If the script has a main function, run it
-        if "main" in namespace and callable(namespace["main"]):
-            if asyncio.iscoroutinefunction(namespace["main"]):
-                # Run async main function using asyncio.run if not in event loop
-                try:
-                    asyncio.get_running_loop()
-                    # We're in an event loop, create a new thread to run asyncio.run
-                    import threading
-
-                    result = None
-                    exception = None
-
-                    def run_async():
-                        nonlocal result, exception
-                        try:
-                            asyncio.run(namespace["main"]())
-                        except Exception as e:
-                            exception = e
-
-                    thread = threading.Thread(target=run_async)
-                    thread.start()
-                    thread.join()
-
-                    if exception:
-                        raise exception
-                except RuntimeError:
-                    # No event loop running, safe to use asyncio.run
-                    asyncio.run(namespace["main"]())
-            else:
-                namespace["main"]()
+    # Forward the script's own output, as running it in-process used to
+    script_output, marker, trailer = proc.stdout.rpartition(_SCRIPT_RESULT_MARKER)
+    if not marker:
+        script_output = proc.stdout
+    if script_output:
+        sys.stdout.write(script_output)
+    if proc.stderr:
+        sys.stderr.write(proc.stderr)
 
-        # Execution summary collection can be added here in the future once
-        # PyLabRobot exposes reliable runtime statistics.
-    except Exception as e:
-        raise Exception(f"Script execution error: {str(e)}") from e
+    if not marker:
+        return None
+    outcome = json.loads(trailer)
+    if "error" in outcome:
+        raise Exception(f"Script execution error: {outcome['error']}")
 
-    return {"summary": summary, "warnings": warnings}
+    # Execution summary collection can be added here in the future once
+    # PyLabRobot exposes reliable runtime statistics.
+    return {"summary": outcome["summary"], "warnings": outcome["warnings"]}
 
 
 def _create_test_result(
@@ -645,8 +860,9 @@ def _create_test_result(
             report_filename = f"pylabrobot_test_report_{timestamp}.json"
             report_path = os.path.join(test_report_dir, report_filename)
 
-            with open(report_path, "w") as f:
-                json.dump(result, f, indent=2)
+            # Encode to bytes up front and write them in a single call
+            with open(report_path, "wb") as f:
+                f.write(_json_dumps_indented(result))
 
             result["test_report_path"] = report_path
 
@@ -668,40 +884,254 @@ _WETLAB_REQUIRED_RECORD_FIELDS = (
     "measurement_unit",
     "measured_at",
 )
-_WETLAB_UPDATABLE_FIELDS = {
+# Pulls all required fields out of a record in one C call; optional ones are read with .get()
+_REQ_GETTER = itemgetter(*_WETLAB_REQUIRED_RECORD_FIELDS)
+_WETLAB_UPDATABLE_FIELDS = frozenset(
+    {
+        "measurement_value",
+        "measurement_unit",
+        "operator",
+        "instrument",
+        "measured_at",
+        "notes",
+    }
+)
+_WETLAB_QUERYABLE_FIELDS = frozenset(
+    {
+        "experiment_id",
+        "sample_id",
+        "assay_name",
+        "condition",
+        "replicate",
+        "measurement_unit",
+        "operator",
+        "instrument",
+    }
+)
+# WHERE fragment and parameter coercion for every supported query filter
+_WETLAB_FILTER_CLAUSES = {field: f"{field} = ?" for field in _WETLAB_QUERYABLE_FIELDS}
+_WETLAB_FILTER_CLAUSES["measured_at_from"] = "measured_at >= ?"
+_WETLAB_FILTER_CLAUSES["measured_at_to"] = "measured_at <= ?"
+_WETLAB_FILTER_COERCE = {"replicate": int}
+_ALLOWED_FILTER_KEYS = frozenset(_WETLAB_FILTER_CLAUSES)
+
+_WETLAB_KEY_WHERE = " AND ".join(f"{field} = ?" for field in _WETLAB_KEY_FIELDS)
+
+# Upsert column order, matching the row tuples built by upsert_wetlab_results
+_WETLAB_UPSERT_COLUMNS = (
+    "experiment_id",
+    "sample_id",
+    "assay_name",
+    "condition",
+    "replicate",
     "measurement_value",
     "measurement_unit",
     "operator",
     "instrument",
     "measured_at",
     "notes",
-}
-_WETLAB_QUERYABLE_FIELDS = {
+)
+# Rows per multi-row upsert statement, keeping it under SQLite's historical 999 bound parameters
+_WETLAB_UPSERT_CHUNK_ROWS = 999 // len(_WETLAB_UPSERT_COLUMNS)
+_DELETE_SQL = f"DELETE FROM {_WETLAB_TABLE_NAME} WHERE {_WETLAB_KEY_WHERE}"
+# Columns returned by query_wetlab_results, in SELECT (and rendered) order
+_WETLAB_RESULT_COLUMNS = (
+    "result_id",
     "experiment_id",
     "sample_id",
     "assay_name",
     "condition",
     "replicate",
+    "measurement_value",
     "measurement_unit",
     "operator",
     "instrument",
-}
+    "measured_at",
+    "notes",
+    "created_at",
+    "updated_at",
+)
+_WETLAB_RESULT_SELECT_LIST = ", ".join(_WETLAB_RESULT_COLUMNS)
+_SELECT_RECENT_SQL = (
+    f"SELECT {_WETLAB_RESULT_SELECT_LIST} FROM {_WETLAB_TABLE_NAME} ORDER BY measured_at DESC, result_id DESC LIMIT ?"
+)
+_COUNT_ALL_SQL = f"SELECT COUNT(*) FROM {_WETLAB_TABLE_NAME}"
+_KEY_EXISTS_SQL = f"SELECT 1 FROM {_WETLAB_TABLE_NAME} WHERE {_WETLAB_KEY_WHERE}"
+_DELETE_BY_ID_SQL = f"DELETE FROM {_WETLAB_TABLE_NAME} WHERE result_id = ?"
+
+
+@functools.lru_cache(maxsize=128)
+def _upsert_sql(row_count: int) -> str:
+    """INSERT ... ON CONFLICT DO UPDATE taking ``row_count`` rows in a single VALUES list.
+
+    Cached per row count, so the SQL text repeats and sqlite3's statement cache reuses it.
+    """
+    row_placeholder = "(" + ", ".join("?" * len(_WETLAB_UPSERT_COLUMNS)) + ")"
+    return f"""
+        INSERT INTO {_WETLAB_TABLE_NAME} ({", ".join(_WETLAB_UPSERT_COLUMNS)})
+        VALUES {", ".join([row_placeholder] * row_count)}
+        ON CONFLICT(experiment_id, sample_id, assay_name, condition, replicate)
+        DO UPDATE SET
+            measurement_value = excluded.measurement_value,
+            measurement_unit = excluded.measurement_unit,
+            operator = excluded.operator,
+            instrument = excluded.instrument,
+            measured_at = excluded.measured_at,
+            notes = excluded.notes,
+            updated_at = CURRENT_TIMESTAMP
+    """
+
+
+@functools.lru_cache(maxsize=128)
+def _update_sql(fields: tuple[str, ...]) -> str:
+    """UPDATE statement setting ``fields`` (sorted) plus updated_at, for the row matching the key.
+
+    The row is only written when at least one field actually changes, so the new values are bound
+    a second time after the key for the IS NOT comparisons.
+    """
+    set_clause = ", ".join(f"{field} = ?" for field in fields)
+    changed_clause = " OR ".join(f"{field} IS NOT ?" for field in fields)
+    return (
+        f"UPDATE {_WETLAB_TABLE_NAME} SET {set_clause}, updated_at = ? "
+        f"WHERE {_WETLAB_KEY_WHERE} AND ({changed_clause})"
+    )
+
+
+# Long-lived connections keyed by (thread ident, database path), each stored with the (st_dev, st_ino)
+# of the file it opened and the thread that owns it. Each thread gets its own connection, so
+# transactions from different threads never share one and no lock is needed around their use; the
+# lock only guards the pool dict itself. Connections of threads that have exited are closed the next
+# time a connection is added.
+_POOL: dict[tuple[int, str], tuple[sqlite3.Connection, tuple[int, int] | None, threading.Thread]] = {}
+_POOL_LOCK = threading.Lock()
+# (st_dev, st_ino) of the file at each database path whose table and indexes are known to exist
+_ENSURED_FILES: dict[str, tuple[int, int]] = {}
+_ENSURED_FILES_LOCK = threading.Lock()
+# Connections inherited from the parent by a forked child. SQLite forbids using them in the child,
+# and closing them there could checkpoint or remove the parent's WAL files, so they are only kept
+# referenced so they are never deallocated (which would close them).
+_FORK_INHERITED_CONNECTIONS: list[sqlite3.Connection] = []
 
 
 def _connect_wetlab_db(db_path: str) -> tuple[sqlite3.Connection, str]:
+    """Return this thread's connection to ``db_path`` (with the wetlab table in place) and the resolved path."""
     if not db_path or not str(db_path).strip():
         raise ValueError("db_path cannot be empty.")
 
-    resolved_db_path = os.path.abspath(os.path.expanduser(str(db_path).strip()))
-    db_dir = os.path.dirname(resolved_db_path)
-    if db_dir:
-        os.makedirs(db_dir, exist_ok=True)
-
-    conn = sqlite3.connect(resolved_db_path)
-    conn.row_factory = sqlite3.Row
+    resolved_db_path = _resolve_wetlab_db_path(str(db_path).strip())
+    current_thread = threading.current_thread()
+    pool_key = (threading.get_ident(), resolved_db_path)
+    pooled = _POOL.get(pool_key)
+    if pooled is not None:
+        conn, file_id, owner = pooled
+        if owner is current_thread and _wetlab_file_id(resolved_db_path) == file_id:
+            return conn, resolved_db_path
+        # The file was deleted or replaced (writes through this connection would go to the old
+        # inode), or the entry belongs to an exited thread whose ident was reused
+        with _POOL_LOCK:
+            _POOL.pop(pool_key, None)
+        _close_quietly(conn)
+
+    existed = _wetlab_file_id(resolved_db_path) is not None
+    conn = _open_wetlab_db(resolved_db_path)
+    file_id = _wetlab_file_id(resolved_db_path)
+    if not existed or _ENSURED_FILES.get(resolved_db_path) != file_id:
+        _ensure_wetlab_table(conn)
+        with _ENSURED_FILES_LOCK:
+            _ENSURED_FILES[resolved_db_path] = file_id
+    with _POOL_LOCK:
+        _prune_wetlab_pool()
+        _POOL[pool_key] = (conn, file_id, current_thread)
     return conn, resolved_db_path
 
 
+def _wetlab_file_id(resolved_db_path: str) -> tuple[int, int] | None:
+    try:
+        stat_result = os.stat(resolved_db_path)
+    except FileNotFoundError:
+        return None
+    return stat_result.st_dev, stat_result.st_ino
+
+
+def _prune_wetlab_pool() -> None:
+    """Close pooled connections whose thread has exited; call with _POOL_LOCK held.
+
+    Threads not started through ``threading`` (``_thread.start_new_thread``, C callbacks) are seen
+    as dummy threads that always report alive, so their connections are never closed from here.
+    """
+    for pool_key in [pool_key for pool_key, (_, _, owner) in _POOL.items() if not owner.is_alive()]:
+        _close_quietly(_POOL.pop(pool_key)[0])
+
+
+def _close_quietly(conn: sqlite3.Connection) -> None:
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+def _close_wetlab_pool() -> None:
+    with _POOL_LOCK:
+        connections = [conn for conn, _, _ in _POOL.values()]
+        _POOL.clear()
+    for conn in connections:
+        _close_quietly(conn)
+
+
+def _forget_wetlab_pool_after_fork() -> None:
+    """In a forked child (e.g. the tool subprocess in biomni.agent.react), drop the parent's connections."""
+    global _POOL_LOCK
+    # Another thread may have held the lock at fork time; it does not exist in the child
+    _POOL_LOCK = threading.Lock()
+    _FORK_INHERITED_CONNECTIONS.extend(conn for conn, _, _ in _POOL.values())
+    _POOL.clear()
+
+
+atexit.register(_close_wetlab_pool)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_wetlab_pool_after_fork)
+
+
+@functools.lru_cache(maxsize=32)
+def _resolve_wetlab_db_path(db_path: str) -> str:
+    return os.path.abspath(os.path.expanduser(db_path))
+
+
+def _open_wetlab_db(resolved_db_path: str) -> sqlite3.Connection:
+    # Only runs on a pool miss, so the directory is recreated if it was removed since the last open
+    Path(resolved_db_path).parent.mkdir(parents=True, exist_ok=True)
+    # IMMEDIATE: the implicit BEGIN before a write batch takes the write lock up front, so a
+    # batch never fails midway upgrading from a read lock
+    conn = sqlite3.connect(
+        resolved_db_path, check_same_thread=False, isolation_level="IMMEDIATE", cached_statements=256
+    )
+    # WAL + synchronous=NORMAL: a commit appends to the log without an fsync of the main db file.
+    # The log is folded back into the db every ~1000 pages; cache_size is in KiB when negative (64 MiB).
+    # A single-writer workflow can additionally run "PRAGMA locking_mode=EXCLUSIVE" on its connection
+    # to skip per-transaction file locking, at the cost of locking out every other process.
+    conn.executescript(
+        """
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        PRAGMA wal_autocheckpoint=1000;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-65536;
+        PRAGMA mmap_size=268435456;
+        """
+    )
+    return conn
+
+
+@functools.lru_cache(maxsize=1)
+def _format_utc_second(epoch_second: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(epoch_second))
+
+
+def _utc_now_iso() -> str:
+    """Current UTC time as YYYY-MM-DDTHH:MM:SS; the string is only re-formatted once per second."""
+    return _format_utc_second(int(time.time()))
+
+
 def _ensure_wetlab_table(conn: sqlite3.Connection) -> None:
     conn.execute(
         f"""
@@ -711,8 +1141,8 @@ def _ensure_wetlab_table(conn: sqlite3.Connection) -> None:
             sample_id TEXT NOT NULL,
             assay_name TEXT NOT NULL,
             condition TEXT NOT NULL,
-            replicate INTEGER NOT NULL,
-            measurement_value REAL NOT NULL,
+            replicate INTEGER NOT NULL CHECK (typeof(replicate) = 'integer'),
+            measurement_value REAL NOT NULL CHECK (typeof(measurement_value) = 'real'),
             measurement_unit TEXT NOT NULL,
             operator TEXT,
             instrument TEXT,
@@ -743,20 +1173,63 @@ def _validate_wetlab_key(key: dict) -> tuple[bool, str]:
     return True, ""
 
 
-def _format_wetlab_rows(columns: list[str], rows: list[sqlite3.Row]) -> str:
-    if not rows:
-        return ""
+def _wetlab_key_values(key: dict) -> tuple:
+    """Normalize a validated composite key into parameters for _WETLAB_KEY_WHERE."""
+    return (
+        str(key["experiment_id"]).strip(),
+        str(key["sample_id"]).strip(),
+        str(key["assay_name"]).strip(),
+        str(key["condition"]).strip(),
+        int(key["replicate"]),
+    )
 
-    values = [[("" if row[col] is None else str(row[col])) for col in columns] for row in rows]
+
+def _iter_fetchmany(cursor: sqlite3.Cursor, size: int = 1000) -> Iterator[tuple]:
+    """Yield a cursor's rows in fetchmany() batches, closing the cursor when exhausted."""
+    try:
+        while batch := cursor.fetchmany(size):
+            yield from batch
+    finally:
+        cursor.close()
+
+
+def _format_wetlab_rows(columns: tuple[str, ...], rows: Iterable[tuple]) -> tuple[str, int]:
+    """Render rows (tuples in ``columns`` order) as an aligned text table.
+
+    Returns the table and the number of rows consumed.
+    """
+    # Stringify and measure in the same pass over the rows, keeping only the strings
     widths = [len(col) for col in columns]
-    for row_values in values:
+    values = []
+    for row in rows:
+        row_values = ["" if value is None else str(value) for value in row]
         for idx, item in enumerate(row_values):
-            widths[idx] = max(widths[idx], len(item))
+            if len(item) > widths[idx]:
+                widths[idx] = len(item)
+        values.append(row_values)
+    if not values:
+        return "", 0
 
-    header = " | ".join(col.ljust(widths[idx]) for idx, col in enumerate(columns))
-    separator = "-+-".join("-" * widths[idx] for idx in range(len(columns)))
-    body = [" | ".join(item.ljust(widths[idx]) for idx, item in enumerate(row_values)) for row_values in values]
-    return "\n".join([header, separator] + body)
+    ljust = str.ljust
+    header = " | ".join(map(ljust, columns, widths))
+    separator = "-+-".join("-" * width for width in widths)
+    body = [" | ".join(map(ljust, row_values, widths)) for row_values in values]
+    return "\n".join([header, separator, *body]), len(values)
+
+
+def _rows_to_csv(columns: tuple[str, ...], rows: Iterable[tuple]) -> tuple[str, int]:
+    """Render rows (tuples in ``columns`` order) as CSV with a header; None becomes an empty field.
+
+    Returns the CSV text and the number of rows consumed.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    row_count = 0
+    for row in rows:
+        writer.writerow(row)
+        row_count += 1
+    return buffer.getvalue().removesuffix("\n"), row_count
 
 
 def init_wetlab_results_table(db_path: str) -> str:
@@ -765,7 +1238,6 @@ def init_wetlab_results_table(db_path: str) -> str:
         conn, resolved_db_path = _connect_wetlab_db(db_path)
         with conn:
             _ensure_wetlab_table(conn)
-        conn.close()
         return (
             "Wetlab results table initialized successfully.\n"
             f"Database: {resolved_db_path}\n"
@@ -775,6 +1247,67 @@ def init_wetlab_results_table(db_path: str) -> str:
         return f"Error initializing wetlab results table: {str(e)}"
 
 
+def _upsert_wetlab_rows(
+    conn: sqlite3.Connection, rows: list[tuple], row_indices: list[int]
+) -> list[tuple[int, str, Exception]]:
+    """Upsert rows in the open transaction; return (record index, "rejected", error) per rejected row.
+
+    Rows go to SQLite in multi-row statements of up to _WETLAB_UPSERT_CHUNK_ROWS rows each, in
+    input order.
+    """
+    rejected = []
+    step = _WETLAB_UPSERT_CHUNK_ROWS
+    for start in range(0, len(rows), step):
+        rejected += _upsert_wetlab_chunk(conn, rows[start : start + step], row_indices[start : start + step])
+    return rejected
+
+
+# Errors raised for a single bad row: a constraint failure, or a value sqlite3 cannot bind
+_WETLAB_ROW_ERRORS = (
+    sqlite3.IntegrityError,
+    sqlite3.InterfaceError,
+    sqlite3.ProgrammingError,
+    OverflowError,
+    UnicodeEncodeError,
+)
+
+
+def _upsert_wetlab_chunk(
+    conn: sqlite3.Connection, rows: list[tuple], row_indices: list[int]
+) -> list[tuple[int, str, Exception]]:
+    """Upsert one chunk with a single statement, bisecting it if a row is rejected.
+
+    A row SQLite rejects (a constraint failure) or cannot bind (an out-of-range integer, a string
+    that does not encode to UTF-8) aborts only that statement, which applies none of its rows, so
+    the chunk is split in half and each half retried. A few bad rows then cost O(log n) extra
+    statements and the rest of the chunk is still applied in order.
+
+    Any other error (a locked or read-only database, an I/O error) is not about a row and may have
+    rolled back the whole transaction, so it propagates and the caller's ``with conn:`` rolls back.
+    """
+    try:
+        conn.execute(_upsert_sql(len(rows)), list(chain.from_iterable(rows)))
+        return []
+    except _WETLAB_ROW_ERRORS as e:
+        if len(rows) == 1:
+            return [(row_indices[0], "rejected", e)]
+    mid = len(rows) // 2
+    return _upsert_wetlab_chunk(conn, rows[:mid], row_indices[:mid]) + _upsert_wetlab_chunk(
+        conn, rows[mid:], row_indices[mid:]
+    )
+
+
+def _describe_wetlab_record_error(reason: str, detail: Any) -> str:
+    """Failure message for a record rejected by upsert_wetlab_results."""
+    if reason == "not_dict":
+        return "not a dictionary."
+    if reason == "missing":
+        missing = [field for field in _WETLAB_REQUIRED_RECORD_FIELDS if field not in detail]
+        return f"missing required fields {missing}."
+    # "invalid" (value coercion) and "rejected" (by SQLite) carry the exception
+    return str(detail)
+
+
 def upsert_wetlab_results(db_path: str, records: list[dict]) -> str:
     """Upsert multiple wetlab result rows using the table's composite unique key."""
     if not isinstance(records, list) or not records:
@@ -783,56 +1316,61 @@ def upsert_wetlab_results(db_path: str, records: list[dict]) -> str:
     try:
         conn, resolved_db_path = _connect_wetlab_db(db_path)
         with conn:
-            _ensure_wetlab_table(conn)
-
-            upsert_sql = f"""
-                INSERT INTO {_WETLAB_TABLE_NAME} (
-                    experiment_id, sample_id, assay_name, condition, replicate,
-                    measurement_value, measurement_unit, operator, instrument, measured_at, notes
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(experiment_id, sample_id, assay_name, condition, replicate)
-                DO UPDATE SET
-                    measurement_value = excluded.measurement_value,
-                    measurement_unit = excluded.measurement_unit,
-                    operator = excluded.operator,
-                    instrument = excluded.instrument,
-                    measured_at = excluded.measured_at,
-                    notes = excluded.notes,
-                    updated_at = CURRENT_TIMESTAMP
-            """
-
-            success_count = 0
+            # Validate and normalize everything first so the database sees a single batch. Failures
+            # are kept as (record index, reason, detail) and only the reported ones get formatted.
+            rows = []
+            row_indices = []
             error_details = []
+            # Local aliases keep the per-record builtin lookups out of the globals dict
+            _str, _int, _float, req_getter = str, int, float, _REQ_GETTER
             for idx, record in enumerate(records, start=1):
-                if not isinstance(record, dict):
-                    error_details.append(f"Record {idx}: not a dictionary.")
+                try:
+                    (
+                        experiment_id,
+                        sample_id,
+                        assay_name,
+                        condition,
+                        replicate,
+                        measurement_value,
+                        measurement_unit,
+                        measured_at,
+                    ) = req_getter(record)
+                    record_get = record.get
+                except (TypeError, AttributeError):
+                    error_details.append((idx, "not_dict", None))
                     continue
-
-                missing = [field for field in _WETLAB_REQUIRED_RECORD_FIELDS if field not in record]
-                if missing:
-                    error_details.append(f"Record {idx}: missing required fields {missing}.")
+                except KeyError:
+                    error_details.append((idx, "missing", record))
                     continue
 
+                operator_name = record_get("operator")
+                instrument = record_get("instrument")
+                notes = record_get("notes")
                 try:
                     values = (
-                        str(record["experiment_id"]).strip(),
-                        str(record["sample_id"]).strip(),
-                        str(record["assay_name"]).strip(),
-                        str(record["condition"]).strip(),
-                        int(record["replicate"]),
-                        float(record["measurement_value"]),
-                        str(record["measurement_unit"]).strip(),
-                        None if record.get("operator") is None else str(record.get("operator")).strip(),
-                        None if record.get("instrument") is None else str(record.get("instrument")).strip(),
-                        str(record["measured_at"]).strip(),
-                        None if record.get("notes") is None else str(record.get("notes")),
+                        _str(experiment_id).strip(),
+                        _str(sample_id).strip(),
+                        _str(assay_name).strip(),
+                        _str(condition).strip(),
+                        _int(replicate),
+                        _float(measurement_value),
+                        _str(measurement_unit).strip(),
+                        None if operator_name is None else _str(operator_name).strip(),
+                        None if instrument is None else _str(instrument).strip(),
+                        _str(measured_at).strip(),
+                        None if notes is None else _str(notes),
                     )
-                    conn.execute(upsert_sql, values)
-                    success_count += 1
                 except Exception as e:
-                    error_details.append(f"Record {idx}: {str(e)}")
+                    error_details.append((idx, "invalid", e))
+                    continue
+                rows.append(values)
+                row_indices.append(idx)
+
+            rejected = _upsert_wetlab_rows(conn, rows, row_indices)
+            success_count = len(rows) - len(rejected)
+            if rejected:
+                error_details = sorted(error_details + rejected, key=itemgetter(0))
 
-        conn.close()
         lines = [
             "Wetlab result UPSERT completed.",
             f"Database: {resolved_db_path}",
@@ -842,8 +1380,8 @@ def upsert_wetlab_results(db_path: str, records: list[dict]) -> str:
         ]
         if error_details:
             lines.append("Failure details:")
-            for detail in error_details[:20]:
-                lines.append(f"- {detail}")
+            for idx, reason, detail in error_details[:20]:
+                lines.append(f"- Record {idx}: {_describe_wetlab_record_error(reason, detail)}")
             if len(error_details) > 20:
                 lines.append(f"- ... and {len(error_details) - 20} more")
         return "\n".join(lines)
@@ -860,51 +1398,50 @@ def update_wetlab_result(db_path: str, key: dict, updates: dict) -> str:
         if not isinstance(updates, dict) or not updates:
             return "Error: updates must be a non-empty dictionary."
 
-        invalid_fields = [field for field in updates if field not in _WETLAB_UPDATABLE_FIELDS]
+        invalid_fields = updates.keys() - _WETLAB_UPDATABLE_FIELDS
         if invalid_fields:
-            return "Error: unsupported update fields: " + ", ".join(invalid_fields)
+            return "Error: unsupported update fields: " + ", ".join(sorted(invalid_fields))
 
         conn, resolved_db_path = _connect_wetlab_db(db_path)
         with conn:
-            _ensure_wetlab_table(conn)
-
-            set_clauses = []
-            values = []
-            for field, value in updates.items():
+            # Bind values in the sorted field order that _update_sql was built with
+            fields = tuple(sorted(updates))
+            new_values = []
+            for field in fields:
+                value = updates[field]
                 if field == "measurement_value":
                     value = float(value)
                 elif field in {"measurement_unit", "operator", "instrument", "measured_at", "notes"} and value is not None:
                     value = str(value)
-                set_clauses.append(f"{field} = ?")
-                values.append(value)
-            set_clauses.append("updated_at = ?")
-            values.append(datetime.utcnow().isoformat(timespec="seconds"))
-
-            where_clauses = [f"{field} = ?" for field in _WETLAB_KEY_FIELDS]
-            key_values = [
-                int(key["replicate"]) if field == "replicate" else str(key[field]).strip()
-                for field in _WETLAB_KEY_FIELDS
-            ]
-            values.extend(key_values)
-
-            sql = (
-                f"UPDATE {_WETLAB_TABLE_NAME} "
-                f"SET {', '.join(set_clauses)} "
-                f"WHERE {' AND '.join(where_clauses)}"
-            )
-            cursor = conn.execute(sql, values)
+                new_values.append(value)
+            key_values = _wetlab_key_values(key)
+            values = [*new_values, _utc_now_iso(), *key_values, *new_values]
+
+            cursor = conn.execute(_update_sql(fields), values)
             affected = cursor.rowcount
+            # Nothing written: tell a missing key apart from a row that already holds these values
+            unchanged = affected == 0 and conn.execute(_KEY_EXISTS_SQL, key_values).fetchone() is not None
 
-        conn.close()
-        return (
-            "Wetlab result update completed.\n"
-            f"Database: {resolved_db_path}\n"
-            f"Rows updated: {affected}"
-        )
+        message = f"Wetlab result update completed.\nDatabase: {resolved_db_path}\nRows updated: {affected}"
+        if unchanged:
+            message += "\nRow already up to date; nothing was changed."
+        return message
     except Exception as e:
         return f"Error updating wetlab result: {str(e)}"
 
 
+def _delete_wetlab_keys(db_path: str, keys: list[dict]) -> tuple[str, int]:
+    """Delete the rows matching validated composite keys in one transaction.
+
+    Returns the resolved database path and the number of rows deleted.
+    """
+    key_values = [_wetlab_key_values(key) for key in keys]
+    conn, resolved_db_path = _connect_wetlab_db(db_path)
+    with conn:
+        cursor = conn.executemany(_DELETE_SQL, key_values)
+        return resolved_db_path, cursor.rowcount
+
+
 def delete_wetlab_result(db_path: str, key: dict) -> str:
     """Delete one wetlab result row selected by the composite key."""
     try:
@@ -912,24 +1449,47 @@ def delete_wetlab_result(db_path: str, key: dict) -> str:
         if not key_valid:
             return f"Error: {key_error}"
 
+        resolved_db_path, deleted = _delete_wetlab_keys(db_path, [key])
+
+        return (
+            "Wetlab result deletion completed.\n"
+            f"Database: {resolved_db_path}\n"
+            f"Rows deleted: {deleted}"
+        )
+    except Exception as e:
+        return f"Error deleting wetlab result: {str(e)}"
+
+
+def delete_wetlab_results_bulk(db_path: str, keys: list[dict]) -> str:
+    """Delete many wetlab result rows selected by composite keys, in a single transaction."""
+    try:
+        if not isinstance(keys, list) or not keys:
+            return "Error: keys must be a non-empty list of dictionaries."
+        for idx, key in enumerate(keys, start=1):
+            key_valid, key_error = _validate_wetlab_key(key)
+            if not key_valid:
+                return f"Error: key {idx}: {key_error}"
+
+        resolved_db_path, deleted = _delete_wetlab_keys(db_path, keys)
+
+        return (
+            "Wetlab result bulk deletion completed.\n"
+            f"Database: {resolved_db_path}\n"
+            f"Input keys: {len(keys)}\n"
+            f"Rows deleted: {deleted}"
+        )
+    except Exception as e:
+        return f"Error deleting wetlab results: {str(e)}"
+
+
+def delete_wetlab_result_by_id(db_path: str, result_id: int) -> str:
+    """Delete one wetlab result row selected by its result_id (the table's integer rowid)."""
+    try:
+        result_id = int(result_id)
         conn, resolved_db_path = _connect_wetlab_db(db_path)
         with conn:
-            _ensure_wetlab_table(conn)
-            sql = (
-                f"DELETE FROM {_WETLAB_TABLE_NAME} "
-                f"WHERE experiment_id = ? AND sample_id = ? AND assay_name = ? AND condition = ? AND replicate = ?"
-            )
-            values = (
-                str(key["experiment_id"]).strip(),
-                str(key["sample_id"]).strip(),
-                str(key["assay_name"]).strip(),
-                str(key["condition"]).strip(),
-                int(key["replicate"]),
-            )
-            cursor = conn.execute(sql, values)
-            deleted = cursor.rowcount
+            deleted = conn.execute(_DELETE_BY_ID_SQL, (result_id,)).rowcount
 
-        conn.close()
         return (
             "Wetlab result deletion completed.\n"
             f"Database: {resolved_db_path}\n"
@@ -939,86 +1499,74 @@ def delete_wetlab_result(db_path: str, key: dict) -> str:
         return f"Error deleting wetlab result: {str(e)}"
 
 
-def query_wetlab_results(db_path: str, filters: dict | None = None, limit: int = 100) -> str:
-    """Query wetlab results with whitelist-based filters and date range support."""
+def query_wetlab_results(
+    db_path: str, filters: dict | None = None, limit: int = 100, output_format: str = "table"
+) -> str:
+    """Query wetlab results with whitelist-based filters and date range support.
+
+    output_format is "table" (aligned text for display) or "csv" (for programmatic consumers).
+    """
     try:
         if filters is None:
             filters = {}
         if not isinstance(filters, dict):
             return "Error: filters must be a dictionary."
+        if output_format not in ("table", "csv"):
+            return "Error: output_format must be 'table' or 'csv'."
 
-        allowed_filter_keys = set(_WETLAB_QUERYABLE_FIELDS) | {"measured_at_from", "measured_at_to"}
-        unknown_keys = [key for key in filters if key not in allowed_filter_keys]
+        unknown_keys = filters.keys() - _ALLOWED_FILTER_KEYS
         if unknown_keys:
             return "Error: unsupported filter fields: " + ", ".join(sorted(unknown_keys))
 
         limit = max(1, int(limit))
         conn, resolved_db_path = _connect_wetlab_db(db_path)
         with conn:
-            _ensure_wetlab_table(conn)
-
             conditions = []
             values = []
-
-            for field in _WETLAB_QUERYABLE_FIELDS:
-                if field in filters and filters[field] is not None:
-                    value = filters[field]
-                    if field == "replicate":
-                        value = int(value)
-                    else:
-                        value = str(value)
-                    conditions.append(f"{field} = ?")
-                    values.append(value)
-
-            measured_at_from = filters.get("measured_at_from")
-            measured_at_to = filters.get("measured_at_to")
-            if measured_at_from is not None:
-                conditions.append("measured_at >= ?")
-                values.append(str(measured_at_from))
-            if measured_at_to is not None:
-                conditions.append("measured_at <= ?")
-                values.append(str(measured_at_to))
-
-            where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
-
-            count_sql = f"SELECT COUNT(*) AS total_count FROM {_WETLAB_TABLE_NAME} {where_clause}"
-            total_count = conn.execute(count_sql, values).fetchone()["total_count"]
-
-            query_sql = (
-                f"SELECT * FROM {_WETLAB_TABLE_NAME} {where_clause} "
-                "ORDER BY measured_at DESC, result_id DESC LIMIT ?"
-            )
+            if filters:
+                add_condition = conditions.append
+                add_value = values.append
+                coerce_get = _WETLAB_FILTER_COERCE.get
+                for field, value in filters.items():
+                    if value is None:
+                        continue
+                    add_condition(_WETLAB_FILTER_CLAUSES[field])
+                    add_value(coerce_get(field, str)(value))
+
+            if conditions:
+                where_clause = f"WHERE {' AND '.join(conditions)}"
+                query_sql = (
+                    f"SELECT {_WETLAB_RESULT_SELECT_LIST} FROM {_WETLAB_TABLE_NAME} {where_clause} "
+                    "ORDER BY measured_at DESC, result_id DESC LIMIT ?"
+                )
+                count_sql = f"SELECT COUNT(*) FROM {_WETLAB_TABLE_NAME} {where_clause}"
+            else:
+                # Unfiltered "most recent rows" listing, the common case: fixed SQL text
+                query_sql, count_sql = _SELECT_RECENT_SQL, _COUNT_ALL_SQL
             query_values = values + [limit]
-            rows = conn.execute(query_sql, query_values).fetchall()
+            # Rows are rendered straight off the cursor, so no more than one fetchmany() batch
+            # of row tuples is alive at a time
+            rows = _iter_fetchmany(conn.execute(query_sql, query_values))
+            if output_format == "csv":
+                table_text, row_count = _rows_to_csv(_WETLAB_RESULT_COLUMNS, rows)
+            else:
+                table_text, row_count = _format_wetlab_rows(_WETLAB_RESULT_COLUMNS, rows)
 
-        conn.close()
+            # A short page already holds every match; only a full page needs the separate count
+            if row_count < limit:
+                total_count = row_count
+            else:
+                total_count = conn.execute(count_sql, values).fetchone()[0]
 
         lines = [
             "Wetlab result query completed.",
             f"Database: {resolved_db_path}",
             f"Total matched rows: {total_count}",
-            f"Returned rows (limit={limit}): {len(rows)}",
+            f"Returned rows (limit={limit}): {row_count}",
         ]
-        if not rows:
+        if not row_count:
             return "\n".join(lines + ["No rows found for the provided filters."])
 
-        columns = [
-            "result_id",
-            "experiment_id",
-            "sample_id",
-            "assay_name",
-            "condition",
-            "replicate",
-            "measurement_value",
-            "measurement_unit",
-            "operator",
-            "instrument",
-            "measured_at",
-            "notes",
-            "created_at",
-            "updated_at",
-        ]
-        table_text = _format_wetlab_rows(columns, rows)
         return "\n".join(lines + ["", table_text])
     except Exception as e:
         return f"Error querying wetlab results: {str(e)}"